@@ -6,6 +6,9 @@ this module handle MariaDB stock database
 """
 
 import MySQLdb as mysql
+import datetime
+from bisect import bisect_right
+from collections import defaultdict
 
 class StockDB():
     def __init__(self, user_id, norm_pwd, db_name):
@@ -368,6 +371,52 @@ class StockDB():
             price_list.extend(nan_list)
         
         return price_list
+
+    def get_future_price_lists(self, pairs, number_of_days=130):
+        '''
+        - batch version of get_future_price_list
+        - chart table is read once per unique code,
+          not twice per (code, date) pair
+        - each price list has same form with get_future_price_list
+
+        input : * pairs [iterable of (code, date)]
+                - stock code and date [date or datetime(00-00-00)]
+
+                * number_of_days [int]
+                - it determines each price list length
+                - default value is 130(days)
+
+        output : * price_dict [dict]
+                 - {(code, date): price_list, ...}
+        '''
+        dates_by_code = defaultdict(list)
+        for code, date in pairs:
+            dates_by_code[code].append(date)
+
+        price_dict = {}
+        for code, dates in dates_by_code.items():
+            sql = f"SELECT date, close FROM c_{code} ORDER BY date ASC"
+            self.cur.execute(sql)
+            rows = self.cur.fetchall()
+            chart_dates = [row[0] for row in rows]
+            closes = [row[1] for row in rows]
+            for date in dates:
+                day = date.date() if isinstance(date, datetime.datetime) else date
+                pos = bisect_right(chart_dates, day)  # number of rows on or before date
+                if pos >= 2:
+                    price_list = [closes[pos-1], closes[pos-2]]
+                elif pos == 1:
+                    price_list = [float('nan'), closes[0]]
+                else:
+                    price_dict[(code, date)] = [float('nan') for _ in range(number_of_days + 2)]
+                    continue
+                price_list.extend(closes[pos:pos+number_of_days])
+                if len(price_list) < number_of_days + 2:
+                    nan_len = (number_of_days + 2) - len(price_list)
+                    price_list.extend([float('nan') for _ in range(nan_len)])
+                price_dict[(code, date)] = price_list
+
+        return price_dict
     
 '''    
 if __name__ == '__main__':
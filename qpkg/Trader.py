@@ -8,13 +8,14 @@ from collections import defaultdict
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
+import bottleneck as bn
 import datetime
-import copy
+import os
+import tempfile
 from sqlalchemy import create_engine
 from sqlalchemy.dialects.mysql import DATE, FLOAT, INTEGER, VARCHAR
-from tqdm import tqdm
+from numba import njit, prange
 from qpkg import qutils
-from frechetdist import frdist
 
 
 class ArgumentError(Exception):
@@ -22,9 +23,121 @@ class ArgumentError(Exception):
 class ClassOperationError(Exception):
     pass
 
+@njit(cache=True, fastmath=True)
+def _frdist_2row(P, Q):
+    '''
+    Discrete frechet distance between two curves.
+    Iterative DP keeping only two rows of the coupling matrix.
+    :param P:[(m,2) float64 ndarray] first curve
+    :param Q:[(n,2) float64 ndarray] second curve
+    :return:[float] frechet distance
+    '''
+    m, n = P.shape[0], Q.shape[0]
+    prev = np.empty(n)
+    cur = np.empty(n)
+    prev[0] = np.sqrt((P[0, 0] - Q[0, 0])**2 + (P[0, 1] - Q[0, 1])**2)
+    for j in range(1, n):
+        d = np.sqrt((P[0, 0] - Q[j, 0])**2 + (P[0, 1] - Q[j, 1])**2)
+        prev[j] = max(prev[j-1], d)
+    for i in range(1, m):
+        d = np.sqrt((P[i, 0] - Q[0, 0])**2 + (P[i, 1] - Q[0, 1])**2)
+        cur[0] = max(prev[0], d)
+        for j in range(1, n):
+            d = np.sqrt((P[i, 0] - Q[j, 0])**2 + (P[i, 1] - Q[j, 1])**2)
+            cur[j] = max(min(cur[j-1], prev[j-1], prev[j]), d)
+        prev, cur = cur, prev
+    return prev[n-1]
+
+@njit(parallel=True, cache=True, error_model='numpy')
+def _scan_windows(arr, window_size, window_move, fr_pat, min_pat, pat_diff,
+                  min_diff_ratio, max_diff_ratio, threshold, same_grid):
+    '''
+    Check every chart window against the pattern in one pass, windows in parallel.
+    window min/max -> diff ratio filter -> scale into pattern range
+    -> frechet lower/upper bound -> frechet distance.
+    :param arr:[(n,) float64 ndarray] chart price
+    :param fr_pat:[(window_size,2) float64 ndarray] pattern curve
+    :param same_grid:[bool] fr_pat x values are 0 ~ window_size-1
+    :return:[(windows,) bool ndarray] pattern matched or not, k-th window starts at k*window_move
+    '''
+    nwin = (arr.shape[0] - window_size) // window_move + 1
+    hits = np.zeros(nwin, dtype=np.bool_)
+    for k in prange(nwin):
+        start = k * window_move
+        mx, mn = arr[start], arr[start]
+        has_nan = False
+        for t in range(start, start + window_size):
+            v = arr[t]
+            if np.isnan(v):
+                has_nan = True
+                break
+            mx = max(mx, v)
+            mn = min(mn, v)
+        if has_nan:
+            continue
+        ratio = (mx - mn) / mn * 100  # percent unit
+        if not (min_diff_ratio <= ratio <= max_diff_ratio):
+            continue
+
+        scale = pat_diff / (mx - mn)
+        fr_cht = np.empty((window_size, 2))
+        for t in range(window_size):
+            fr_cht[t, 0] = t
+            fr_cht[t, 1] = arr[start + t] * scale + min_pat
+        # both end points must be coupled -> lower bound of frechet distance
+        lb = max(abs(fr_cht[0, 1] - fr_pat[0, 1]), abs(fr_cht[-1, 1] - fr_pat[-1, 1]))
+        if lb >= threshold:
+            continue
+        # same x grid, point-to-point coupling -> upper bound of frechet distance
+        if same_grid:
+            ub = 0.0
+            for t in range(window_size):
+                ub = max(ub, abs(fr_cht[t, 1] - fr_pat[t, 1]))
+            if ub < threshold:
+                hits[k] = True
+                continue
+        hits[k] = _frdist_2row(fr_cht, fr_pat) < threshold
+    return hits
+
+@njit(cache=True)
+def _streak_hits(fore, inst, th_fore, th_inst, days, mode_code):
+    '''
+    Find rows where investor buying quantity streak reaches days.
+    :param fore:[(n,) int64 ndarray] foreigner quantity (NULL is 0)
+    :param inst:[(n,) int64 ndarray] institution quantity (NULL is 0)
+    :param th_fore:[int] threshold foreigner quantity
+    :param th_inst:[int] threshold institution quantity
+    :param days:[int] continuous days
+    :param mode_code:[int] 0-BOTH, 1-FORE, 2-INST
+    :return:[(?,) int64 ndarray] row indices
+    '''
+    hits = np.empty(fore.shape[0], dtype=np.int64)
+    cnt = 0
+    day_cnt = 0
+    for i in range(fore.shape[0]):
+        f_ok = fore[i] != 0 and fore[i] >= th_fore
+        i_ok = inst[i] != 0 and inst[i] >= th_inst
+        if mode_code == 0:
+            ok = f_ok and i_ok
+        elif mode_code == 1:
+            ok = f_ok
+        else:
+            ok = i_ok
+        if ok:
+            day_cnt += 1
+        else:
+            day_cnt = 0
+        if day_cnt == days:
+            hits[cnt] = i
+            cnt += 1
+    return hits[:cnt]
+
 class BackTester():
     def __init__(self, db=None):
-        self._test_list = [] # (,3) dim list. [['code', 'date', 'group'], ...]
+        # test list stored as parallel lists, i-th test is (self._codes[i], self._dates[i], self._groups[i])
+        self._codes = []
+        self._dates = []
+        self._groups = []
         self._code_nums = defaultdict(int)
         self._tax = 0.3
         self._commission = 0.015
@@ -47,73 +160,88 @@ class BackTester():
         code = '_'.join([data[0], no])
         date = data[1]
         group = data[2]
-        self._test_list.append([code, date, group])
+        self._codes.append(code)
+        self._dates.append(date)
+        self._groups.append(group)
         self._code_nums[data[0]] += 1
 
     def delete_all(self):
-        self._test_list.clear()
+        self._codes.clear()
+        self._dates.clear()
+        self._groups.clear()
 
     def delete(self, data=None):
         if data is None:
-            self._test_list.pop()
+            i = -1
         else:
-            self._test_list.remove(data)
+            i = self.get_test_list().index(list(data))
+        del self._codes[i], self._dates[i], self._groups[i]
 
     def get_test_list(self):
-        return copy.deepcopy(self._test_list)
+        '''
+        :return:[(?,3) dim list] [['code', 'date', 'group'], ...]
+        '''
+        return [list(row) for row in zip(self._codes, self._dates, self._groups)]
 
     def back_test(self, number_of_days=130):
         '''
         - this method calculate time-varying stock profit ratio by group.
-        - it use self._test_list.
+        - it use test list (self._codes, self._dates, self._groups).
         :param number_of_days:[int] backtest check after number_of_days.
         :return testResult:[class testResult] backtest result, it has result DataFrame and Group list.
         DataFrame columns : 'group', 'code', 'date', 'prev_price', 'price', 'captured', after days
         (1) time-varying profit ratio in stock.  (2) statics(mean, geometric mean, std dev, median) in time.
         '''
-        data_list = []
-        group_list = []
+        group_list = list(dict.fromkeys(self._groups))
+        n = len(self._codes)
+        prices = np.full((n, number_of_days + 2), np.nan, dtype=np.float64)  # prev_price, price, days
+        codes = np.empty(n, dtype=object)
+        dates = np.empty(n, dtype=object)
+        grps = np.empty(n, dtype=object)
+        codes[:], dates[:], grps[:] = self._codes, self._dates, self._groups
+        valid = np.zeros(n, dtype=bool)
 
-        # captured means rate of rise in captured date
-        column_list = ['grp', 'code', 'date', 'prev_price', 'price', 'captured']
         days = ['_' + str(i) for i in range(1, number_of_days+1)]
-        column_list.extend(days)
+
+        # fetch every future price list before iteration
+        # same (code, date) repeats with different '_no' suffix, fetch it once
+        pairs = list(dict.fromkeys((code[:6], date) for code, date in zip(self._codes, self._dates)))
+        price_dict = self._db.get_future_price_lists(pairs, number_of_days)
 
         # input list iteration
-        for i in range(len(self._test_list)):
-            code = self._test_list[i][0]
-            date = self._test_list[i][1]
-            group = self._test_list[i][2]
-            if group not in group_list:
-                group_list.append(group)
-            row = [group, code, date]
-            price = self._db.get_future_price_list(code[:6], date, number_of_days)
+        for i, (code, date) in enumerate(zip(self._codes, self._dates)):
+            price = price_dict[(code[:6], date)]
             if np.isnan(price[1]):
                 continue
-            row.extend(price)
-            row.insert(5, 0)  # 'captured' column
+            prices[i] = price
+            valid[i] = True
+
+        prices, codes, dates, grps = prices[valid], codes[valid], dates[valid], grps[valid]
 
-            data_list.append(row)
+        # ratio block : (rows, 1 + days), captured means rate of rise in captured date
+        ratios = np.empty((len(prices), number_of_days + 1), dtype=np.float64)
+        np.divide(prices[:, 1], prices[:, 0], out=ratios[:, 0])
+        np.divide(prices[:, 2:], prices[:, 1:2], out=ratios[:, 1:])
 
+        # statistics rows by group, appended after code rows
         static = {'mean': np.nanmean, 'g_mean': qutils.nangmean, 'stddev': np.nanstd, 'median': np.nanmedian}
+        stat_rows = []
         for group in group_list:
-            rest = [None for _ in range(number_of_days + 4)]
-            for stat in static.keys():
-                row = [group, stat]
-                row.extend(rest)
-                data_list.append(row)
-
-        result = pd.DataFrame(data=data_list, columns=column_list)
-        for day in days:
-            result[day] = result[day] / result['price']
-        result['captured'] = result['price'] / result['prev_price']
-
-        days.append('captured')
-        for group in group_list:
-            for stat, stat_func in static.items():
-                gc = result['grp'] == group
-                sc = result['code'] == stat
-                result.loc[gc & sc, days] = stat_func(result.loc[gc, days], axis=0)
+            grp_block = ratios[grps == group]
+            stat_rows.extend(stat_func(grp_block, axis=0) for stat_func in static.values())
+        stat_num = len(stat_rows)
+        ratios = np.concatenate([ratios, np.reshape(stat_rows, (stat_num, number_of_days + 1))])
+        prices = np.concatenate([prices[:, :2], np.full((stat_num, 2), np.nan)])
+        codes = np.concatenate([codes, np.tile(list(static.keys()), len(group_list)).astype(object)])
+        dates = np.concatenate([dates, np.full(stat_num, None, dtype=object)])
+        grps = np.concatenate([grps, np.repeat(np.array(group_list, dtype=object), len(static))])
+
+        # ratio values are around 0.1~10, float32 is enough
+        info = pd.DataFrame({'grp': grps, 'code': codes, 'date': dates,
+                             'prev_price': pd.array(prices[:, 0], dtype='Int32'),
+                             'price': pd.array(prices[:, 1], dtype='Int32')})
+        ratio_df = pd.DataFrame(ratios.astype(np.float32), columns=['captured'] + days)
+        result = pd.concat([info, ratio_df], axis=1)
 
         return testResult(result, group_list)
 
@@ -137,7 +265,9 @@ class BackTester():
         :return: no return, this method insert test data that pattern matched
         """
         if window_move is None:
-            window_move = window_size // 10
+            window_move = max(1, window_size // 10)
+        if window_move < 1:
+            raise ArgumentError('window_move must be 1 or more')
 
         if start_date and end_date:
             chart = self._db.get_range_from_chart(code, start_date, end_date)
@@ -149,49 +279,41 @@ class BackTester():
 
         max_pat, min_pat = max(pattern), min(pattern)
         pat_diff = max_pat - min_pat
-        for i in tqdm(range(0, len(chart), window_move)):
-            part_chart = chart[i:i+window_size]
-            if len(part_chart) < window_size:
-                break
-            max_val, min_val = max(part_chart), min(part_chart)
-            cht_diff = max_val - min_val
-            cht_diff_ratio = cht_diff / min_val * 100  # percent unit
-            if min_diff_ratio <= cht_diff_ratio <= max_diff_ratio:
-                fr_cht = part_chart * (pat_diff / cht_diff) + min_pat
-                fr_cht = [[j, data] for j, data in enumerate(fr_cht)] # convert pd.Series to list
-                if frdist(fr_cht, fr_pat) < threshold:
-                    date = chart.index[i+window_size-1]
-                    self.insert([code, date, group])
+
+        arr = chart.to_numpy(dtype=np.float64)
+        if len(arr) < window_size:
+            return
+        same_grid = fr_pat.shape == (window_size, 2) and np.array_equal(fr_pat[:, 0], np.arange(window_size))
+        hits = _scan_windows(arr, window_size, window_move, fr_pat, float(min_pat), float(pat_diff),
+                             float(min_diff_ratio), float(max_diff_ratio), float(threshold), same_grid)
+        for k in np.flatnonzero(hits):
+            date = chart.index[window_move*k + window_size - 1]
+            self.insert([code, date, group])
 
     def _choose_chart_price(self, chart, price_opt, avg_window=None):
-        columns = ['date', 'open', 'close', 'high', 'low',
-                   'volume', 'fore', 'inst', 'indi']
-        df_chart = pd.DataFrame(data=chart, columns=columns)
-        df_chart['price'] = 0
-        if 'c' in price_opt: df_chart['price'] += df_chart['close']
-        if 'o' in price_opt: df_chart['price'] += df_chart['open']
-        if 'h' in price_opt: df_chart['price'] += df_chart['high']
-        if 'l' in price_opt: df_chart['price'] += df_chart['low']
-        df_chart['price'] /= len(price_opt)
-
-        ret_chart = pd.Series(data=df_chart['price'],
-                              index=df_chart['date'])
-        if avg_window:
-            ret_chart = ret_chart.rolling(window=avg_window, center=True, min_periods=1).mean()
+        # chart columns : date, open, close, high, low, volume, fore, inst, indi
+        arr = np.asarray(chart, dtype=object).reshape(-1, 9)
+        ohlc = arr[:, 1:5].astype(np.float64)
+        sel = np.array(['o' in price_opt, 'c' in price_opt, 'h' in price_opt, 'l' in price_opt])
+        price = ohlc[:, np.flatnonzero(sel)].sum(axis=1) / sel.sum()
+
+        if avg_window and len(price):
+            # centered moving average : trailing move_mean on a NaN-padded tail, shifted back
+            shift = (avg_window - 1) // 2
+            padded = np.concatenate([price, np.full(shift, np.nan)])
+            window = min(avg_window, len(padded))
+            price = bn.move_mean(padded, window=window, min_count=1)[shift:]
+        ret_chart = pd.Series(data=price, index=pd.DatetimeIndex(arr[:, 0]))
         return ret_chart
 
     def _trans_pat_to_frpat(self, pattern, window_size):
         p = (window_size - 1) // (len(pattern) - 1)
         q = (window_size - 1) % (len(pattern) - 1)
         intervals = [p + 1 if i < q else p for i in range(len(pattern) - 1)]
-        fr_pat = [[0, float(pattern[0])]]
-        cnt = 0
-        for i, itv in enumerate(intervals):
-            for j in range(1, itv + 1):
-                cnt += 1
-                pat_val = pattern[i] + (pattern[i + 1] - pattern[i]) * j / itv
-                fr_pat.append([cnt, pat_val])
-        return fr_pat
+        knots = np.concatenate([[0], np.cumsum(intervals)])  # x position of each pattern point
+        xs = np.arange(window_size, dtype=np.float64)
+        ys = np.interp(xs, knots, np.asarray(pattern, dtype=np.float64))
+        return np.stack([xs, ys], axis=1)  # (window_size, 2) float64 ndarray
 
     def ins_institution_condition(self, code, th_fore=1, th_inst=1, days=3, group='1',
                                   start_date=None, end_date=None):
@@ -211,38 +333,16 @@ class BackTester():
         else:
             chart = self._db.get_all_from_chart(code)
 
-        if th_fore != 0 and th_inst != 0:  mode = 'BOTH'
-        elif th_fore != 0:  mode = 'FORE'
-        elif th_inst != 0:  mode = 'INST'
+        if th_fore != 0 and th_inst != 0:  mode_code = 0  # BOTH
+        elif th_fore != 0:  mode_code = 1  # FORE
+        elif th_inst != 0:  mode_code = 2  # INST
         else:
             raise ArgumentError('At least one param at th_fore and th_inst should be more than 0')
 
-        day_cnt = 0
-        for c in chart:
-            date = c[0]
-            fore = c[6]
-            inst = c[7]
-            if self._compare_quantity(mode, th_fore, th_inst, fore, inst):
-                day_cnt += 1
-            else:
-                day_cnt = 0
-            if day_cnt == days:
-                self.insert([code, date, group])
-
-    def _compare_quantity(self, mode, th_fore, th_inst, fore, inst):
-        if mode == 'BOTH':
-            if fore and inst:
-                if fore >= th_fore and inst >= th_inst:
-                    return True
-        elif mode == 'FORE':
-            if fore:
-                if fore >= th_fore:
-                    return True
-        elif mode == 'INST':
-            if inst:
-                if inst >= th_inst:
-                    return True
-        return False
+        fore = np.array([c[6] or 0 for c in chart], dtype=np.int64)
+        inst = np.array([c[7] or 0 for c in chart], dtype=np.int64)
+        for i in _streak_hits(fore, inst, th_fore, th_inst, days, mode_code):
+            self.insert([code, chart[i][0], group])
 
 class testResult():
     '''
@@ -257,52 +357,69 @@ class testResult():
         self._groups = group_list
         self._max = None
         self._min = None
+        if result is not None:
+            self._index_rows()
 
-    def _get_max_idx_value(self):
-        max_group = {}
-        cols = self._result.columns[6:]
-        sc = self._result['code'].isin(['mean', 'g_mean', 'stddev', 'median'])
-        for group in self._groups:
-            gc = self._result['grp'] == group
-            max_col_idx = self._result.loc[gc & ~sc, cols].idxmax()
-            max_sr = pd.Series([self._result.at[max_col_idx[i], i] for i in max_col_idx.index],
-                               index=max_col_idx.index)   # [Series] max_col_idx has (idx:df column, value:df index)
-            max_col = max_sr.idxmax()
-            max_group[group] = [max_col_idx[max_col], max_col, max_sr[max_col]]  # index, column, value
-        return max_group
-
-    def _get_min_idx_value(self):
-        min_group = {}
+    def _index_rows(self):
+        '''
+        Cache row positions so group and stat rows are found without boolean masks.
+        self._grp_idx:[dict] {group:(?,) code row positions, ...}
+        self._stat_row:[dict] {(group, stat):row position, ...}
+        self._day_ints:[(days,) ndarray] day numbers of columns _1, _2, ...
+        '''
+        grps = self._result['grp'].to_numpy()
+        codes = self._result['code'].to_numpy()
+        sc = np.isin(codes, ['mean', 'g_mean', 'stddev', 'median'])
+        data_pos = np.flatnonzero(~sc)
+        sub_idx = self._result.iloc[data_pos].groupby('grp', sort=False).indices
+        self._grp_idx = {group: data_pos[pos] for group, pos in sub_idx.items()}
+        self._stat_row = {(grps[pos], codes[pos]): pos for pos in np.flatnonzero(sc)}
+        self._day_ints = np.arange(1, len(self._result.columns) - 5)  # columns[6:] are _1 ~ _N
+        self._stat_mat = {}
+
+    def _get_stat_matrix(self, stat):
+        '''
+        Return (groups, days) matrix of one statistic, extracted once and memoized.
+        :param stat:[str] 'mean', 'g_mean', 'stddev' or 'median'
+        '''
+        if stat not in self._stat_mat:
+            rows = [self._stat_row[(group, stat)] for group in self._groups]
+            self._stat_mat[stat] = self._result.iloc[rows, 6:].to_numpy(dtype=np.float64)
+        return self._stat_mat[stat]
+
+    def _get_max_min_idx_value(self):
+        '''
+        Find max and min profit ratio of each group in one scan of the day columns.
+        :return:[tuple] (max_group, min_group), each {group:[index, column, value], ...}
+        '''
+        max_group, min_group = {}, {}
         cols = self._result.columns[6:]
-        sc = self._result['code'].isin(['mean', 'g_mean', 'stddev', 'median'])
+        block = self._result[cols].to_numpy(dtype=np.float64)
         for group in self._groups:
-            gc = self._result['grp'] == group
-            min_col_idx = self._result.loc[gc & ~sc, cols].idxmin()
-            min_sr = pd.Series([self._result.at[min_col_idx[i], i] for i in min_col_idx.index],
-                               index=min_col_idx.index)   # [Series] min_col_idx has (idx:df column, value:df index)
-            min_col = min_sr.idxmax()
-            min_group[group] = [min_col_idx[min_col], min_col, min_sr[min_col]]  # index, column, value
-        return min_group
+            rows = self._grp_idx[group]
+            sub = block[rows]
+            i, j = np.unravel_index(np.nanargmax(sub), sub.shape)
+            max_group[group] = [self._result.index[rows[i]], cols[j], sub[i, j]]  # index, column, value
+            i, j = np.unravel_index(np.nanargmin(sub), sub.shape)
+            min_group[group] = [self._result.index[rows[i]], cols[j], sub[i, j]]  # index, column, value
+        return max_group, min_group
 
     def show_summary(self):
         '''
         Print mean, geometric mean, standard deviation, median over time
         and max profit, min profit data in result of back test
         '''
-        if self._max is None:
-            self._max = self._get_max_idx_value()  # {group:[row, column, value], ...}
-        if self._min is None:
-            self._min = self._get_min_idx_value()  # {group:[row, column, value], ...}
+        if self._max is None or self._min is None:
+            self._max, self._min = self._get_max_min_idx_value()  # {group:[row, column, value], ...}
 
         stats = ['mean', 'g_mean', 'stddev', 'median']
         col = self._result.columns[-1]
+        last = self._result[col].to_numpy()
         for group in self._groups:
-            gc = self._result['grp'] == group
             print(f"## GROUP_{group} RESULT ##")
             print(f"AFTER {col} DAYS")
             for stat in stats:
-                sc = self._result['code'] == stat
-                val = float(self._result.loc[gc & sc, col])
+                val = float(last[self._stat_row[(group, stat)]])
                 print(f"{stat:<8}: {val:.3f}")
             print(f"max val > code : {self._result.at[self._max[group][0], 'code'][:6]}")
             print(f"          date : {self._result.at[self._max[group][0], 'date']}")
@@ -320,29 +437,22 @@ class testResult():
         '''
         color = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
                  '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
-        cols = self._result.columns[6:]
-        int_cols = pd.to_numeric(cols.str.replace('_', ''))
+        int_cols = self._day_ints
+        mean, g_mean = self._get_stat_matrix('mean'), self._get_stat_matrix('g_mean')
         # mean, g_mean graph
         plt.figure('Profit Graph')
         for i, group in enumerate(self._groups):
-            gc = self._result['grp'] == group
-            sc_mean = self._result['code'] == 'mean'
-            sc_gmean = self._result['code'] == 'g_mean'
-            mean = self._result.loc[gc & sc_mean, cols].squeeze()  # change (1, days) into (days,)
-            g_mean = self._result.loc[gc & sc_gmean, cols].squeeze()  # change (1, days) into (days,)
-            plt.plot(int_cols, mean, color=color[i], label=f"[G_{group}] mean", linestyle='-')
-            plt.plot(int_cols, g_mean, color=color[i], label=f"[G_{group}] g_mean", linestyle='-.')
+            plt.plot(int_cols, mean[i], color=color[i], label=f"[G_{group}] mean", linestyle='-')
+            plt.plot(int_cols, g_mean[i], color=color[i], label=f"[G_{group}] g_mean", linestyle='-.')
         plt.title('Profit Graph')
         plt.xlabel('Days')
         plt.legend()
 
         # stddev graph
+        std = self._get_stat_matrix('stddev')
         plt.figure('Stddev Graph')
         for i, group in enumerate(self._groups):
-            gc = self._result['grp'] == group
-            sc_std = self._result['code'] == 'stddev'
-            std = self._result.loc[gc & sc_std, cols].squeeze()  # change (1, days) into (days,)
-            plt.plot(int_cols, std, color=color[i], label=f"[G_{group}] stddev")
+            plt.plot(int_cols, std[i], color=color[i], label=f"[G_{group}] stddev")
         plt.title('Stddev Graph')
         plt.xlabel('Days')
         plt.legend()
@@ -354,18 +464,45 @@ class testResult():
     def get_result_data(self):
         return self._result.copy()
     
-    def save(self, table_name, msg, path):
+    def save(self, table_name, msg, path, load_infile=False):
+        '''
+        Save result into back test DB table and write save log.
+        :param table_name:[str] new table name
+        :param msg:[str] log message
+        :param path:[str] directory of backtest.log
+        :param load_infile:[bool] bulk load via temporary csv and LOAD DATA LOCAL INFILE
+        (local_infile must be allowed in DB server)
+        '''
         con_str = f"mysql+mysqldb://{self._bt_info['USER_ID']}:{self._bt_info['NORM_PWD']}"\
                   f"@localhost/{self._bt_info['DB_NAME']}"
-        engine = create_engine(con_str)
+        engine = create_engine(con_str, connect_args={'local_infile': 1} if load_infile else {})
         type_dict = {'grp': VARCHAR(10), 'code': VARCHAR(10), 'date': DATE(),
                      'prev_price': INTEGER(), 'price': INTEGER(), 'captured': FLOAT()}
         for day in self._result.columns[6:]:
             type_dict[day] = FLOAT()
 
         # Making DB from self._result_data
-        self._result.to_sql(name=table_name, con=engine, chunksize=1000,
-                            index_label='idx', dtype=type_dict)
+        if load_infile:
+            self._result.head(0).to_sql(name=table_name, con=engine, index_label='idx', dtype=type_dict)
+            f = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+            cols = ', '.join(['idx'] + list(self._result.columns))
+            try:
+                with f:
+                    self._result.to_csv(f, index_label='idx', na_rep='\\N', lineterminator='\n')
+                with engine.begin() as con:
+                    con.execute(f"LOAD DATA LOCAL INFILE '{f.name.replace(os.sep, '/')}' INTO TABLE {table_name} "
+                                f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' IGNORE 1 LINES ({cols});")
+            except Exception:
+                # don't leave the empty table behind (e.g. local_infile disabled)
+                with engine.begin() as con:
+                    con.execute(f"DROP TABLE IF EXISTS {table_name};")
+                raise
+            finally:
+                os.remove(f.name)
+        else:
+            # multi-row INSERT per chunk
+            self._result.to_sql(name=table_name, con=engine, chunksize=1000,
+                                index_label='idx', dtype=type_dict, method='multi')
         with engine.connect() as con:
             con.execute(f"ALTER TABLE {table_name} ADD PRIMARY KEY (idx);")
             con.execute(f"ALTER TABLE {table_name} MODIFY idx INTEGER;")
@@ -381,6 +518,9 @@ class testResult():
 
         self._result = pd.read_sql_table(table_name=table_name, con=engine, index_col='idx')
         self._groups = self._result['grp'].drop_duplicates()
+        self._max = None
+        self._min = None
+        self._index_rows()
 
 if __name__=='__main__':
     pat = [6,4,3,2,3,4,6,4,6]
@@ -165,11 +165,12 @@ def get_comp_corp_url(code):
 def nangmean(arr, axis=None):
     '''
     Calculate geometric mean in the numpy way.
+    exp(mean(log)) form, product of many values does not overflow.
+    NaN and non-positive values are ignored.
     :param arr:[(n) or (n,n) dim] 1-dim or 2-dim list
     :param axis:[int] 0-column axis, 1-row axis.
     :return: geometric means[float]
     '''
-    arr = np.asarray(arr)
-    valids = np.sum(~np.isnan(arr), axis=axis)
-    prod = np.nanprod(arr, axis=axis)
-    return np.power(prod, 1. / valids)
+    arr = np.asarray(arr, dtype=np.float64)
+    arr = np.where(arr > 0, arr, np.nan)
+    return np.exp(np.nanmean(np.log(arr), axis=axis))